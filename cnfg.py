@@ -1,6 +1,8 @@
 """
         Configuration Management for MICE
 """
+import copy as cp
+import functools as ft
 import os
 import pathlib as pt
 
@@ -15,6 +17,7 @@ _filename = pt.Path(__file__).name.replace(".py", "")
 _dbg_string = "%s:" % (_filename)
 
 __configuration_path = os.path.join(pt.Path(__file__).parents[0], "bin", "mice_config.ini")
+_CONFIG = None  # -> The process-wide configuration, populated on the first call to get_config.
 
 
 # --|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--#
@@ -23,21 +26,41 @@ __configuration_path = os.path.join(pt.Path(__file__).parents[0], "bin", "mice_c
 
 # USER CONFIGURATION
 #----------------------------------------------------------------------------------------------------------------------#
+@ft.lru_cache(maxsize=8)
+def _read_config_cached(configuration_path: str, mtime: float) -> dict:
+    """
+    Parses the configuration file. ``mtime`` is only used as part of the cache key.
+    :return: The configuration dictionary
+    """
+    return tml.load(configuration_path)
+
+
 def read_config(configuration_path: str) -> dict:
     """
     Grabbing the configuration system from the configuration file path.
     :return: The configuration dictionary
     """
     ### reading the TOML string ###
-    config_dict = tml.load(configuration_path)
+    # The parse is cached against the modification time so repeat calls only re-read an edited file. Callers get
+    #  their own copy so that edits to it can't leak into the cached parse.
+    config_dict = cp.deepcopy(_read_config_cached(configuration_path, os.path.getmtime(configuration_path)))
     return config_dict
 
 
+def get_config() -> dict:
+    """
+    Fetches the process-wide MICE configuration, reading it from the configuration file on first use.
+    :return: The configuration dictionary
+    """
+    global _CONFIG
+    if _CONFIG is None:
+        _CONFIG = read_config(__configuration_path)
+    return _CONFIG
 
 
 # --|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--#
 # -------------------------------------------------------  MAIN  --------------------------------------------------------#
 # --|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--#
 if __name__ == '__main__':
-    CONFIG = read_config(__configuration_path)
+    CONFIG = get_config()
     print(CONFIG)
@@ -3,35 +3,60 @@
 Main executable file for MICE
 
 """
-import argparse
-import struct
 import numpy as np
 import logging as log
 from utils import set_log
 import pathlib as pt
-from cnfg import read_config,__configuration_path
-from colorama import Fore,Back,Style
-import os
+from cnfg import get_config
+from colorama import Fore,Style
+from dataclasses import dataclass
 import toml
-from datetime import datetime
 # --|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--#
 # ------------------------------------------------------ Variables ------------------------------------------------------#
 # --|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--#
 _filename = pt.Path(__file__).name.replace(".py", "")
-CONFIG = read_config(__configuration_path)  # reads the configuration file.
+CONFIG = get_config()  # fetches the shared configuration.
 _dbg_string = "%s:" % (_filename)
 __output_log_type = None
 
 
 title_directory = "./bin/ect/title_text"
+
+# Particle Layout
+#--------------------------------#
+particle_dtype = np.dtype([("coords","<f4",3),
+                           ("radii","<f4"),
+                           ("rho","<f4"),
+                           ("vels","<f4",3),
+                           ("U","<f4")])
+
 verbose = CONFIG["SYSTEM"]["debug_mode"]
 
 fdbg_string = "[" + Fore.GREEN + Style.BRIGHT + "MICE-C" + Style.RESET_ALL + "]:"
 done_string = "[" + Fore.CYAN + Style.BRIGHT + "DONE" + Style.RESET_ALL + "]"
+crit_string = "[" + Fore.RED + Style.BRIGHT + "CRITICAL" + Style.RESET_ALL + "]"
 # --|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--#
 # ------------------------------------------------------ Functions ------------------------------------------------------#
 # --|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--#
 
+# DATA STRUCTURES
+#----------------------------------------------------------------------------------------------------------------------#
+@dataclass(slots=True)
+class Cluster:
+    # The recombined particle data of a generated cluster, one contiguous array per field.
+    coords: np.ndarray
+    radii: np.ndarray
+    vels: np.ndarray
+    U: np.ndarray
+    IDs: np.ndarray
+
+    def __post_init__(self):
+        self.coords = np.ascontiguousarray(self.coords,dtype=np.float32)
+        self.radii = np.ascontiguousarray(self.radii,dtype=np.float32)
+        self.vels = np.ascontiguousarray(self.vels,dtype=np.float32)
+        self.U = np.ascontiguousarray(self.U,dtype=np.float32)
+        self.IDs = np.ascontiguousarray(self.IDs,dtype=np.int32)
+
 # MINI FUNCTIONS
 #----------------------------------------------------------------------------------------------------------------------#
 def print_title():
@@ -57,96 +82,111 @@ def go_exit():
 #----------------------------------------------------------------------------------------------------------------------#
 def write_output(data):
     pass
-def generate_cluster(dataset:dict,MOND=False):
+def generate_cluster(dataset:dict,MOND=False) -> Cluster:
     # Intro Debugging
     #------------------------------------------------------------------------------------------------------------------#
     func_dbgstring = "MICE:generate_cluster:"
-    log.debug("%sGenerating a cluster with MOND=%s."%(func_dbgstring,MOND))
+    log.debug("%sGenerating a cluster with MOND=%s.", func_dbgstring,MOND)
 
     #------------------------------------------------------------------------------------------------------------------#
     # Parsing Components                                                                                               #
     #------------------------------------------------------------------------------------------------------------------#
     print("%s Parsing Components..."%fdbg_string,end="")
-    log.debug("%s Parsing Components..."%func_dbgstring)
+    log.debug("%s Parsing Components...", func_dbgstring)
 
     components = {} #-> A list of the components included in the system.
 
 
-    position_data = {} #-> This is where we will end up storing the positional data for each component.
-    velocity_data = {} #-> Here we store the velocity data.
-    temperature_data = {} #-> Here we store the temperature data.
+    particle_data = {} #-> One structured array (particle_dtype) per component holding all of its particle fields.
 
     print(done_string)
-    log.debug("%sFinished parsing components. Found %s components."%(func_dbgstring,len(components)))
+    log.debug("%sFinished parsing components. Found %s components.", func_dbgstring,len(components))
 
     #------------------------------------------------------------------------------------------------------------------#
     # Setting positions                                                                                                #
     #------------------------------------------------------------------------------------------------------------------#
     # At this stage, we pass each component to the create_position data function and then proceed to generate
-    #  the positional data. Finally, we save the position data values in the position_data dictionary.
+    #  the positional data. Finally, we allocate the component's particle array and store the positions in it.
     #  THIS DOESN"T CHANGE WITH MOND
 
     print("\t%s Setting positions..."%fdbg_string)
-    log.info("%s Setting Positions..."%func_dbgstring)
+    log.info("%s Setting Positions...", func_dbgstring)
 
     for component in components:
-        position_data[component]["Coords"],position_data[component]["radii"] = None #TODO: set positions
+        coords,radii = None #TODO: set positions
+
+        particle_data[component] = np.zeros(len(coords),dtype=particle_dtype)
+        particle_data[component]["coords"],particle_data[component]["radii"] = coords,radii
 
         #- Computing the density rho -#
-        position_data[component]["rho"] = None #TODO: rho
+        pass #TODO: rho -> particle_data[component]["rho"]
 
     print("\t%s Setting positions...%s"%(fdbg_string,done_string))
-    log.info("%s Setting Positions... Finished." % func_dbgstring)
+    log.info("%s Setting Positions... Finished.", func_dbgstring)
     #------------------------------------------------------------------------------------------------------------------#
     # Setting Velocity Components                                                                                      #
     #------------------------------------------------------------------------------------------------------------------#
 
     print("\t%s Setting velocities..."%fdbg_string)
-    log.info("%s Setting velocities..." % func_dbgstring)
+    log.info("%s Setting velocities...", func_dbgstring)
 
     for component in components:
-        velocity_data[component]["vels"] = None #TODO: set velocities
+        pass #TODO: set velocities -> particle_data[component]["vels"]
 
     print("\t%s Setting velocities...%s"%(fdbg_string,done_string))
-    log.info("%s Setting velocities... DONE" % func_dbgstring)
+    log.info("%s Setting velocities... DONE", func_dbgstring)
     #------------------------------------------------------------------------------------------------------------------#
     # Setting Temperature Components                                                                                   #
     #------------------------------------------------------------------------------------------------------------------#
 
     print("\t%s Setting temperatures..."%fdbg_string)
-    log.info("%s Setting temperatures..." % func_dbgstring)
+    log.info("%s Setting temperatures...", func_dbgstring)
 
     for component in components:
-        temperature_data[component]["U"], = None #TODO: set temperature
+        pass #TODO: set temperature -> particle_data[component]["U"]
 
     print("\t%s Setting temperatures...%s" % (fdbg_string, done_string))
-    log.info("%s Setting temperatures... DONE" % func_dbgstring)
+    log.info("%s Setting temperatures... DONE", func_dbgstring)
     #------------------------------------------------------------------------------------------------------------------#
     #  Data Recombination                                                                                              #
     #------------------------------------------------------------------------------------------------------------------#
-    # Core objective here is to recombine all of our data into single arrays.
-    #
+    # Core objective here is to recombine all of our data into single arrays. Each field is copied straight from the
+    #  component arrays into one preallocated buffer, so no concatenated intermediate is built. Components without
+    #  optional data (velocities, temperatures) keep the zeros they were allocated with, keeping every field aligned
+    #  particle for particle.
     #
-    try: #- REQUIRED SETS -#
-        coords = np.concatenate([position_data[comp]["coords"] for comp in position_data if position_data[comp]["coords"]])
-        radii = np.concatenate([position_data[comp]["radii"] for comp in position_data if position_data[comp]["radii"]])
+    try:
+        if not len(particle_data):
+            raise ValueError("No component particle data was generated.")
+
+        n_total = sum(len(particles) for particles in particle_data.values())
+        cluster_data = {field: np.empty((n_total,*particle_dtype[field].shape),dtype=particle_dtype[field].base)
+                        for field in ("coords","radii","vels","U")}
+
+        offset = 0
+        for particles in particle_data.values():
+            for field in cluster_data:
+                cluster_data[field][offset:offset+len(particles)] = particles[field]
+            offset += len(particles)
     except ValueError as msg:
-        print("\t%s [%s] Recombination Processing failed! Check log file for details." % (
-        fdbg_string, Fore.RED + Style.BRIGHT + "CRITICAL" + Style.RESET_ALL))
+        print("\t%s %s Recombination Processing failed! Check log file for details." % (fdbg_string, crit_string))
 
-        log.critical("%s Failed to recombine datasets due to the following error: %s"%(func_dbgstring,repr(msg)))
+        log.critical("%s Failed to recombine datasets due to the following error: %r", func_dbgstring,msg)
         go_exit()
 
-    #- NON_REQUIRED SETS -#
-    vels = np.concatenate([velocity_data[comp]["vels"] for comp in velocity_data if velocity_data[comp]["vels"]])
-    U = np.concatenate([temperature_data[comp]["U"] for comp in temperature_data if temperature_data[comp]["U"]])
+    #- PARTICLE IDS -#
+    # GADGET expects IDs 1..N; generating them as an int32 array lets write_block serialize them directly.
+    IDs = np.arange(1,n_total+1,dtype=np.int32)
 
     # Returning
-    return [coords,radii,vels,U]
+    return Cluster(**cluster_data,IDs=IDs)
 # --|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--#
 # -------------------------------------------------------- MAIN ---------------------------------------------------------#
 # --|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--#
 if __name__ == '__main__':
+    # argparse is only needed by the command line interface, so library importers don't load it.
+    import argparse
+
     #------------------------------------------------------------------------------------------------------------------#
     # Intro Text                                                                                                       #
     #------------------------------------------------------------------------------------------------------------------#
@@ -185,11 +225,10 @@ if __name__ == '__main__':
     try:
         user_configuration = toml.load(args.input_file)
     except FileNotFoundError:
-        print("\n%s [%s] Failed to locate the file at %s."%(fdbg_string,Fore.RED+Style.BRIGHT+"CRITICAL"+Style.RESET_ALL,args.input_file))
+        print("\n%s %s Failed to locate the file at %s."%(fdbg_string,crit_string,args.input_file))
         go_exit()
     except toml.TomlDecodeError:
-        print("\n%s [%s] File at %s was not TOML formatted." % (
-        fdbg_string, Fore.RED + Style.BRIGHT + "CRITICAL" + Style.RESET_ALL, args.input_file))
+        print("\n%s %s File at %s was not TOML formatted." % (fdbg_string, crit_string, args.input_file))
         go_exit()
 
     print(done_string)
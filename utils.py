@@ -4,6 +4,7 @@
     MICE-C system.
 """
 import logging as log
+import mmap
 import os
 import pathlib as pt
 import struct
@@ -11,13 +12,13 @@ from datetime import datetime
 
 import numpy as np
 import toml
-from cnfg import read_config, __configuration_path
+from cnfg import get_config
 
 # --|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--#
 # ------------------------------------------------------ Variables ------------------------------------------------------#
 # --|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--|--#
 _filename = pt.Path(__file__).name.replace(".py", "")
-CONFIG = read_config(__configuration_path)  # reads the configuration file.
+CONFIG = get_config()  # fetches the shared configuration.
 _dbg_string = "%s:" % (_filename)
 __output_log_type = None
 
@@ -39,6 +40,16 @@ header_typing = {"mass_array":list,
 
 }
 
+# Binary Constants
+#--------------------------------#
+_DUMMY_STRUCTS = {}  # -> Cached structs for write_dummy keyed by the number of integers.
+_HEADER_SIZE = 256  # -> GADGET-2 headers are always 256 bytes.
+_HEADER_STRUCT = struct.Struct('<6I6dddii6Iii4dii')  # -> The populated header fields; the rest is zero filler.
+_BLOCK_HEADER_STRUCT = struct.Struct('<i4siii')  # -> Block prelude: 8, block name, nbytes + 8, 8, nbytes.
+_BLOCK_DTYPES = {'f': np.dtype('<f4'), 'i': np.dtype('<i4')}  # -> On-disk dtype of each write_block data type.
+_SNAPSHOT_BUFFER_SIZE = 4 * 1024 * 1024  # -> Write buffer for snapshot files so the small block writes are coalesced.
+_SNAPSHOT_MMAP_THRESHOLD = 64 * 1024 * 1024  # -> Snapshots at least this large are written through an mmap.
+
 # ----------------------------------------------------------------------------------------------------------------------#
 #                                                                                                                      #
 #                                                 LOGGING AND DEBUGGING                                                #
@@ -48,20 +59,9 @@ class CustomFormatter(log.Formatter):
     """
     Custom logging formatter for file logging.
     """
-    format = CONFIG["SYSTEM"]["LOGGING"]["log_format"]
-
-    FORMATS = {
-        log.DEBUG   : format,
-        log.INFO    : format,
-        log.WARNING : format,
-        log.ERROR   : format,
-        log.CRITICAL: format
-    }
-
-    def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = log.Formatter(log_fmt)
-        return formatter.format(record)
+    def __init__(self):
+        # All levels share the configured format, so the formatter is set up once rather than per record.
+        super().__init__(CONFIG["SYSTEM"]["LOGGING"]["log_format"])
 
 
 def set_log(script_name: str,
@@ -75,18 +75,15 @@ def set_log(script_name: str,
     """
     global __output_log_type
     ### Generating the correct file location ###
-    if not os.path.exists(os.path.join(CONFIG["SYSTEM"]["DIRECTORIES"]["log_directory"], script_name)):
-        # This path doesn't yet exist and therefore needs to be generated.
-        pt.Path.mkdir(pt.Path(os.path.join(CONFIG["SYSTEM"]["DIRECTORIES"]["log_directory"], script_name)),
-                      parents=True)  # make the directory
+    log_directory = os.path.join(file, script_name)
+    os.makedirs(log_directory, exist_ok=True)  # -> no-op if it already exists, safe against concurrent starts.
 
     ### Setting the logger ###
     handler_sh_file = log.FileHandler(
-        filename=os.path.join(file, script_name,
-                              "%s.log" % datetime.now().strftime('%m-%d-%Y_%H-%M-%S')))
+        filename=os.path.join(log_directory, "%s.log" % datetime.now().strftime('%m-%d-%Y_%H-%M-%S')))
     handler_sh_file.setFormatter(CustomFormatter())
     log.basicConfig(handlers=[handler_sh_file], level=level)
-    log.info("%sset_log: Initialized log. level=%s." % (_dbg_string, level))
+    log.info("%sset_log: Initialized log. level=%s.", _dbg_string, level)
 
     mpl_logger = log.getLogger('matplotlib')
     mpl_logger.setLevel(log.WARNING)
@@ -123,7 +120,7 @@ def read_header(n_part: list) -> str:
     # Introductory debugging
     # ------------------------------------------------------------------------------------------------------------------#
     fdbg_string = "%s:read_header: " % _dbg_string
-    log.debug("%sReading header data for n_part = %s." % (fdbg_string, n_part))
+    log.debug("%sReading header data for n_part = %s.", fdbg_string, n_part)
 
     # Setup
     # ------------------------------------------------------------------------------------------------------------------#
@@ -170,18 +167,23 @@ def read_header(n_part: list) -> str:
     h_data.append(1.0)  # hubble_param
     h_data.append(0)  # flag_age
     h_data.append(0)  # flag_metals
-    for i in np.arange(88):
-        h_data.append(b'\x00')
-    s = struct.Struct('iiiiii dddddd d d i i iiiiii i i dddd ii cccc\
-    cccccccccccccccccccccccccccccccccccccccccccccccccccccccccccccccc\
-    cccccccccccccccccccc')
 
     # Returning
     # ------------------------------------------------------------------------------------------------------------------#
-    packed_data = s.pack(*h_data)
+    packed_data = _HEADER_STRUCT.pack(*h_data).ljust(_HEADER_SIZE, b'\x00')  # -> unused filler.
     return packed_data
 
 
+def _get_dummy_struct(n: int) -> struct.Struct:
+    """
+    Fetches (or builds) the cached struct for packing ``n`` dummy integers.
+    """
+    s = _DUMMY_STRUCTS.get(n)
+    if s is None:
+        s = _DUMMY_STRUCTS[n] = struct.Struct('<%di' % n)
+    return s
+
+
 def write_dummy(f, values_list: list):
     """
     Writes a dummy byte sequence to the variable.
@@ -194,11 +196,7 @@ def write_dummy(f, values_list: list):
     -------
 
     """
-    for i in values_list:
-        dummy = [i]
-        s = struct.Struct('i')
-        d = s.pack(*dummy)
-        f.write(d)
+    f.write(_get_dummy_struct(len(values_list)).pack(*values_list))
 
 
 def write_block(f, block_data, data_type, block_name):
@@ -218,27 +216,23 @@ def write_block(f, block_data, data_type, block_name):
     # Setup and Debug
     # ------------------------------------------------------------------------------------------------------------------#
     fdbg_string = "%s:write_block: " % _dbg_string
-    log.debug("%sWriting block %s." % (fdbg_string, block_name))
+    log.debug("%sWriting block %s.", fdbg_string, block_name)
 
     # Writing the block
     # ------------------------------------------------------------------------------------------------------------------#
-    # Setup
-    write_dummy(f, [8])
-    block_name_binary = [bytes(i, 'utf-8') for i in block_name]
-    f.write(struct.pack('c' * 4, *block_name_binary))
-
     # Determining format
     if (block_name == 'HEAD'):
-        nbytes = 256  # -> Forced by format.
+        buffer = block_data  # -> Already packed by read_header.
     else:
-        fmt = data_type * len(block_data)
-        nbytes = len(block_data) * 4  # -> 4 bytes for each piece of data.
-
-    write_dummy(f, [nbytes + 8, 8, nbytes])
-    if (block_name == 'HEAD'):
-        f.write(block_data)
-    else:
-        f.write(struct.pack(fmt, *block_data))
+        # The whole block is cast in one pass by numpy and its memory handed to the writer without a copy.
+        # It is flattened first, as memoryview can't byte-cast a view with a zero in its shape (e.g. an empty POS block).
+        buffer = memoryview(np.ascontiguousarray(block_data, dtype=_BLOCK_DTYPES[data_type]).reshape(-1)).cast('B')
+    nbytes = len(buffer)
+    tag = block_name.encode('ascii').ljust(4, b' ')[:4]  # -> GADGET tags are exactly 4 characters.
+
+    # -> The block name record and the size marker of the data record go out as a single write.
+    f.write(_BLOCK_HEADER_STRUCT.pack(8, tag, nbytes + 8, 8, nbytes))
+    f.write(buffer)
     write_dummy(f, [nbytes])
 
 
@@ -260,23 +254,24 @@ def write_snapshot(n_part, data_list, outfile='init.dat',
     # Setup and Debug
     # ------------------------------------------------------------------------------------------------------------------#
     fdbg_string = "%s:write_snapshot: " % _dbg_string
-    log.debug("%sWriting the snapshot to %s." % (fdbg_string, outfile))
+    log.debug("%sWriting the snapshot to %s.", fdbg_string, outfile)
 
     # Partitioning data and setting up
     # ------------------------------------------------------------------------------------------------------------------#
     N_gas = n_part[0]  # -> Identifies the number of gas particles so we know to write U,rho, etc.
 
     # - fetching data types -#
-    pos_data = data_list[0]
-    vel_data = data_list[1]
-    ID_data = data_list[2]
-    mass_data = data_list[3]
+    # Each block is cast to its on-disk type once here so that write_block only has to serialize it.
+    pos_data = np.ascontiguousarray(data_list[0], dtype='<f4')
+    vel_data = np.ascontiguousarray(data_list[1], dtype='<f4')
+    ID_data = np.ascontiguousarray(data_list[2], dtype='<i4')
+    mass_data = np.ascontiguousarray(data_list[3], dtype='<f4')
     if (N_gas > 0):
-        U_data = data_list[4]
-        rho_data = data_list[5]
-        smoothing_data = data_list[6]
+        U_data = np.ascontiguousarray(data_list[4], dtype='<f4')
+        rho_data = np.ascontiguousarray(data_list[5], dtype='<f4')
+        smoothing_data = np.ascontiguousarray(data_list[6], dtype='<f4')
     if len(data_list) > 7:
-        Z = data_list[7]
+        Z = np.ascontiguousarray(data_list[7], dtype='<f4')
     else:
         Z = False
 
@@ -285,20 +280,38 @@ def write_snapshot(n_part, data_list, outfile='init.dat',
     if file_format == 'gadget2':
         # Getting the header.
         header_data = read_header(n_part)
-        with open(outfile, 'wb') as f:
-            write_block(f, header_data, None, 'HEAD')
-            write_block(f, pos_data, 'f', 'POS ')
-            write_block(f, vel_data, 'f', 'VEL ')
-            write_block(f, ID_data, 'i', 'ID  ')
-            write_block(f, mass_data, 'f', 'MASS')
-            if (N_gas > 0):
-                write_block(f, U_data, 'f', 'U   ')
-
-                if (len(data_list) > 7):
-                    write_block(f, Z, 'f', 'Z   ')
 
-                write_block(f, rho_data, 'f', 'RHO ')
-                write_block(f, smoothing_data, 'f', 'HSML')
+        blocks = [(header_data, None, 'HEAD'),
+                  (pos_data, 'f', 'POS '),
+                  (vel_data, 'f', 'VEL '),
+                  (ID_data, 'i', 'ID  '),
+                  (mass_data, 'f', 'MASS')]
+        if (N_gas > 0):
+            blocks.append((U_data, 'f', 'U   '))
+
+            if (len(data_list) > 7):
+                blocks.append((Z, 'f', 'Z   '))
+
+            blocks.append((rho_data, 'f', 'RHO '))
+            blocks.append((smoothing_data, 'f', 'HSML'))
+
+        # - Each block costs its data plus the 4 byte tag and five 4 byte size markers -#
+        file_size = sum(len(block_data) if block_name == 'HEAD' else block_data.nbytes
+                        for block_data, _, block_name in blocks) + 24 * len(blocks)
+
+        if file_size >= _SNAPSHOT_MMAP_THRESHOLD:
+            # Large snapshots are copied straight into a mapping of the output file rather than through write().
+            log.debug("%sMapping %s bytes for %s.", fdbg_string, file_size, outfile)
+            with open(outfile, 'w+b') as f:
+                f.truncate(file_size)
+                with mmap.mmap(f.fileno(), file_size, access=mmap.ACCESS_WRITE) as mm:
+                    for block in blocks:
+                        write_block(mm, *block)
+                    mm.flush()
+        else:
+            with open(outfile, 'wb', buffering=_SNAPSHOT_BUFFER_SIZE) as f:
+                for block in blocks:
+                    write_block(f, *block)
 
 
     else:
@@ -318,8 +331,8 @@ def read_configuration_file(filepath: str) -> list:
     """
     # Intro debugging
     # ------------------------------------------------------------------------------------------------------------------#
-    fdbg_string = "%sread_configuration_file: "
-    log.debug("%sAttempting to read a configuration file at %s." % (fdbg_string, filepath))
+    fdbg_string = "%sread_configuration_file: " % _dbg_string
+    log.debug("%sAttempting to read a configuration file at %s.", fdbg_string, filepath)
 
     #------------------------------------------------------------------------------------------------------------------#
     #       Loading data, checking headers, forcing compliance                                                         #
@@ -342,17 +355,17 @@ def read_configuration_file(filepath: str) -> list:
     header = configuration_data["HEADER"]
 
     ##- Type Coercion -##
-    missing_headers = [i for i in header_typing if i not in header]
+    missing_headers = set(header_typing).difference(header)
 
-    if len(missing_headers):
-        raise SyntaxError("%sFailed to find header kwargs %s in the configuration file at %s."%(fdbg_string,missing_headers,filepath))
+    if missing_headers:
+        raise SyntaxError("%sFailed to find header kwargs %s in the configuration file at %s."%(fdbg_string,sorted(missing_headers),filepath))
 
-    for key, value in header:
-        header[key] = header_typing[key](value)
+    for key, caster in header_typing.items():
+        header[key] = caster(header[key])
 
     #- Checking the Components -#--------------------------------------------------------------------------------------#
     components = [i for i in configuration_data if i != "HEADER"]
-    log.debug("%sFound %s components: %s."%(fdbg_string,len(components),components))
+    log.debug("%sFound %s components: %s.", fdbg_string,len(components),components)
 
 
 